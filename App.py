@@ -8,13 +8,24 @@ from PIL import Image, ImageTk
 import datetime
 from decimal import Decimal
 import pandas as pd
+import numpy as np
+import math
 import pyodbc
 import hashlib
+import argparse
+import json
+import sqlite3
+import threading
 
 # ----------------------------------------------------------------
 # 2. FUNCIÓN DE CONEXIÓN A LA BASE DE DATOS
 # ----------------------------------------------------------------
-def get_db_connection():
+# Modo write-behind (opcional): ruta del diario SQLite local donde se encolan asignaciones,
+# cierres y borrados cuando el servidor está lejos o caído. None lo desactiva.
+WRITE_BEHIND_JOURNAL = None  # Ej: 'diario_tickets.db'
+JOURNAL_POLL_MS = 5000  # Cada cuánto la GUI revisa si el replicador envió cambios
+
+def get_db_connection(show_errors=True):
     """Establece y devuelve una conexión a SQL Server usando Autenticación de Windows."""
     try:
         # --- ¡CONFIGURA ESTOS VALORES! ---
@@ -33,23 +44,58 @@ def get_db_connection():
         conn = pyodbc.connect(conn_str)
         return conn
     except pyodbc.Error as e:
-        messagebox.showerror("Error de Conexión", f"No se pudo conectar a SQL Server: {e}")
+        # El replicador del diario corre en segundo plano y no debe abrir diálogos
+        if show_errors:
+            messagebox.showerror("Error de Conexión", f"No se pudo conectar a SQL Server: {e}")
         return None
 
 # ----------------------------------------------------------------
 # 3. LÓGICA DE NEGOCIO (BACKEND) - CLASE TaskTrackingSystem
 # ----------------------------------------------------------------
+class StaleTicketError(Exception):
+    """El ticket cambió entre la lectura y la escritura (p. ej. otro cliente lo marcó como vencido)."""
+
+
 class TaskTrackingSystem:
-    def __init__(self):
+    # Intervalos del histograma de retrasos de la tabla resumen: (límite superior en horas, columna).
+    # El último intervalo no tiene límite superior.
+    DELAY_BUCKETS = [
+        (1, "delay_0_1h"),
+        (4, "delay_1_4h"),
+        (8, "delay_4_8h"),
+        (24, "delay_8_24h"),
+        (None, "delay_24h_plus"),
+    ]
+    # Contadores de la tabla sla_daily_summary, en el orden en que se envían como parámetros
+    SUMMARY_COUNTERS = [
+        "assigned_count", "open_count", "overdue_count", "on_time_count", "late_count",
+        "total_delay_hours",
+    ] + [column for _, column in DELAY_BUCKETS]
+
+    def __init__(self, journal_path=None):
         # Este diccionario puede permanecer en memoria ya que es configuración estática
         self.task_types = {
             "Gestión Creación de Usuario": 4,
             "Gestión de Implementación Dar de Baja BD": 8,
         }
+        # Con diario local, las escrituras se encolan y las envía JournalReplayer
+        self.journal = WriteBehindJournal(journal_path) if journal_path else None
+        # En modo write-behind las lecturas fallan en silencio (sin diálogos) y la GUI
+        # sigue trabajando con la última copia del servidor más lo pendiente en el diario
+        self.show_errors = self.journal is None
+        self._open_rows = None
+        self.open_rows_loaded_at = None  # Cuándo se leyó del servidor la copia de tickets abiertos
+        # Entradas que el replicador ya aplicó en el servidor y que la copia quizá aún no refleja;
+        # se aplican encima de ella hasta la siguiente lectura exitosa
+        self._replayed_entries = []
+        self._replayed_lock = threading.Lock()
+        # Parámetros del modelo de riesgo: se cargan la primera vez que se usan y se
+        # actualizan con cada ticket que se completa desde este cliente
+        self.risk_model = BreachRiskModel()
 
     def _execute_query(self, query, params=(), fetch=None, is_commit=False):
         """Método privado para manejar la ejecución de consultas de forma segura."""
-        conn = get_db_connection()
+        conn = get_db_connection(self.show_errors)
         if not conn:
             return None if fetch else False
         
@@ -64,12 +110,199 @@ class TaskTrackingSystem:
                 return cursor.fetchall()
             return True
         except pyodbc.Error as e:
-            messagebox.showerror("Error de Base de Datos", f"Ocurrió un error: {e}")
+            if self.show_errors:
+                messagebox.showerror("Error de Base de Datos", f"Ocurrió un error: {e}")
             return None if fetch else False
         finally:
             if conn:
                 conn.close()
 
+    def _execute_transaction(self, statements, show_errors=None):
+        """Ejecuta varias sentencias (query, params) en una sola transacción: o se aplican todas o ninguna.
+
+        Una sentencia (query, params, True) debe afectar al menos una fila; si no lo hace se
+        deshace todo y se lanza StaleTicketError para que el llamador relea el ticket.
+        Con show_errors=False no se abren diálogos: los errores de BD se propagan al llamador.
+        Por defecto se usa self.show_errors.
+        """
+        if show_errors is None:
+            show_errors = self.show_errors
+        conn = get_db_connection(show_errors)
+        if not conn:
+            return False
+
+        try:
+            cursor = conn.cursor()
+            for statement in statements:
+                cursor.execute(statement[0], statement[1])
+                if len(statement) > 2 and statement[2] and cursor.rowcount == 0:
+                    raise StaleTicketError(statement[0])
+            conn.commit()
+            return True
+        except StaleTicketError:
+            conn.rollback()
+            raise
+        except pyodbc.Error as e:
+            conn.rollback()
+            if not show_errors:
+                raise
+            messagebox.showerror("Error de Base de Datos", f"Ocurrió un error: {e}")
+            return False
+        finally:
+            conn.close()
+
+    # --- TABLA RESUMEN DIARIA DE SLA (sla_daily_summary) ---
+    # Cada ticket aporta a una sola fila, la de (fecha de recepción, empleado, tipo de tarea).
+    # Las operaciones que cambian un ticket restan su aporte anterior y suman el nuevo
+    # dentro de la misma transacción que modifica la tabla tickets.
+
+    def _delay_bucket(self, delay_hours):
+        """Devuelve la columna del histograma que corresponde a un retraso en horas."""
+        for limit, column in self.DELAY_BUCKETS:
+            if limit is None or delay_hours <= limit:
+                return column
+
+    def _summary_contribution(self, status, delay_hours=0):
+        """Aporte de un ticket con el estado dado a los contadores de su fila resumen."""
+        contribution = dict.fromkeys(self.SUMMARY_COUNTERS, 0)
+        contribution["assigned_count"] = 1
+        delay_hours = float(delay_hours or 0)
+        if status == "Open":
+            contribution["open_count"] = 1
+        elif status == "Overdue":
+            contribution["overdue_count"] = 1
+        elif status == "Completed On Time":
+            contribution["on_time_count"] = 1
+        elif status == "Completed Late":
+            contribution["late_count"] = 1
+            contribution["total_delay_hours"] = delay_hours
+            contribution[self._delay_bucket(delay_hours)] = 1
+        return contribution
+
+    def _summary_delta_statement(self, received_time, employee_id, task_type, deltas):
+        """Construye el MERGE que suma `deltas` a la fila resumen del ticket (creándola si no existe)."""
+        columns = self.SUMMARY_COUNTERS
+        source_cols = ", ".join(f"? AS {c}" for c in columns)
+        update_cols = ", ".join(f"{c} = s.{c} + src.{c}" for c in columns)
+        insert_cols = ", ".join(columns)
+        insert_vals = ", ".join(f"src.{c}" for c in columns)
+        sql = f"""
+        MERGE sla_daily_summary WITH (HOLDLOCK) AS s
+        USING (SELECT ? AS summary_date, ? AS employee_id, ? AS task_type, {source_cols}) AS src
+        ON s.summary_date = src.summary_date AND s.employee_id = src.employee_id AND s.task_type = src.task_type
+        WHEN MATCHED THEN UPDATE SET {update_cols}
+        WHEN NOT MATCHED THEN INSERT (summary_date, employee_id, task_type, {insert_cols})
+            VALUES (src.summary_date, src.employee_id, src.task_type, {insert_vals});
+        """
+        params = (received_time.date(), employee_id, task_type) + tuple(deltas[c] for c in columns)
+        return sql, params
+
+    def _summary_change(self, old_contribution, new_contribution):
+        """Diferencia entre dos aportes (nuevo - anterior) para aplicarla con un solo MERGE."""
+        old_contribution = old_contribution or dict.fromkeys(self.SUMMARY_COUNTERS, 0)
+        new_contribution = new_contribution or dict.fromkeys(self.SUMMARY_COUNTERS, 0)
+        return {c: new_contribution[c] - old_contribution[c] for c in self.SUMMARY_COUNTERS}
+
+    def _summary_select_sql(self):
+        """SELECT agregado sobre tickets con las mismas reglas que _summary_contribution (para el backfill)."""
+        late = "t.status = 'Completed Late'"
+        bucket_exprs = []
+        lower = None
+        for limit, column in self.DELAY_BUCKETS:
+            conditions = [late]
+            if lower is not None:
+                conditions.append(f"ISNULL(t.delay_hours, 0) > {lower}")
+            if limit is not None:
+                conditions.append(f"ISNULL(t.delay_hours, 0) <= {limit}")
+            bucket_exprs.append(f"SUM(CASE WHEN {' AND '.join(conditions)} THEN 1 ELSE 0 END) AS {column}")
+            lower = limit
+        return f"""
+        SELECT CAST(t.received_time AS DATE) AS summary_date, t.employee_id, t.task_type,
+               COUNT(*) AS assigned_count,
+               SUM(CASE WHEN t.status = 'Open' THEN 1 ELSE 0 END) AS open_count,
+               SUM(CASE WHEN t.status = 'Overdue' THEN 1 ELSE 0 END) AS overdue_count,
+               SUM(CASE WHEN t.status = 'Completed On Time' THEN 1 ELSE 0 END) AS on_time_count,
+               SUM(CASE WHEN {late} THEN 1 ELSE 0 END) AS late_count,
+               SUM(CASE WHEN {late} THEN ISNULL(t.delay_hours, 0) ELSE 0 END) AS total_delay_hours,
+               {", ".join(bucket_exprs)}
+        FROM tickets t WITH (TABLOCK, HOLDLOCK)
+        GROUP BY CAST(t.received_time AS DATE), t.employee_id, t.task_type
+        """
+
+    def rebuild_sla_summary(self, show_errors=True):
+        """Recalcula sla_daily_summary completa desde tickets (backfill o corrección de desvíos).
+
+        Bloquea tickets (lectura compartida, hasta el commit) antes de tocar el resumen, en el
+        mismo orden que assign/complete/delete: las escrituras concurrentes esperan al backfill
+        en vez de provocar deadlocks o violaciones de clave en sla_daily_summary.
+        """
+        columns = ", ".join(["summary_date", "employee_id", "task_type"] + self.SUMMARY_COUNTERS)
+        statements = [
+            ("SELECT COUNT(*) FROM tickets WITH (TABLOCK, HOLDLOCK)", ()),
+            ("DELETE FROM sla_daily_summary", ()),
+            (f"INSERT INTO sla_daily_summary ({columns}) {self._summary_select_sql()}", ()),
+        ]
+        try:
+            success = self._execute_transaction(statements, show_errors)
+        except pyodbc.Error as e:
+            return False, f"Fallo al reconstruir el resumen diario de SLA: {e}"
+        if success:
+            return True, "Resumen diario de SLA reconstruido."
+        if not show_errors:
+            return False, "Fallo al reconstruir el resumen diario de SLA: no se pudo conectar a SQL Server."
+        return False, "Fallo al reconstruir el resumen diario de SLA."
+
+    def get_sla_summary(self, start_date, end_date):
+        """Filas del resumen diario entre dos fechas (inclusive), para dashboards y reportes mensuales."""
+        columns = ", ".join(f"s.{c}" for c in self.SUMMARY_COUNTERS)
+        sql = f"""
+        SELECT s.summary_date, e.nombre, s.task_type, {columns}
+        FROM sla_daily_summary s JOIN empleados e ON s.employee_id = e.id
+        WHERE s.summary_date BETWEEN ? AND ?
+        ORDER BY s.summary_date, e.nombre, s.task_type
+        """
+        return self._execute_query(sql, (start_date, end_date), fetch='all')
+
+    def _insert_ticket_statement(self, ticket_number, employee_id, task_type, received_time):
+        """Sentencia INSERT de un ticket nuevo con su fecha de finalización esperada según el SLA."""
+        sla_hours = self.task_types.get(task_type, 0)
+        expected_completion = received_time + datetime.timedelta(hours=sla_hours)
+        sql = """
+        INSERT INTO tickets (ticket_number, employee_id, task_type, received_time, expected_completion, status)
+        VALUES (?, ?, ?, ?, ?, 'Open')
+        """
+        return sql, (ticket_number, employee_id, task_type, received_time, expected_completion)
+
+    def _completion_status(self, expected_completion, completion_time):
+        """Devuelve (estado, horas de retraso) de un ticket completado en completion_time."""
+        if completion_time > expected_completion:
+            delay_seconds = (completion_time - expected_completion).total_seconds()
+            return "Completed Late", round(delay_seconds / 3600, 2)
+        return "Completed On Time", 0
+
+    def _complete_ticket_statement(self, ticket_number, completion_time, status, delay_hours, old_status, old_delay):
+        # Solo actualiza si el ticket sigue como se leyó; si no, el ajuste del resumen sería incorrecto
+        sql = """
+        UPDATE tickets 
+        SET actual_completion = ?, status = ?, delay_hours = ? 
+        WHERE ticket_number = ? AND status = ? AND COALESCE(delay_hours, 0) = ?
+        """
+        return sql, (completion_time, status, delay_hours, ticket_number, old_status, old_delay or 0), True
+
+    def _delete_ticket_statement(self, ticket_number, old_status, old_delay):
+        # La cláusula WHERE es CRUCIAL para no borrar toda la tabla; el estado y el retraso
+        # garantizan que se descuenta del resumen lo mismo que se borra.
+        sql = "DELETE FROM tickets WHERE ticket_number = ? AND status = ? AND COALESCE(delay_hours, 0) = ?"
+        return sql, (ticket_number, old_status, old_delay or 0), True
+
+    def _journal_write(self, operation, ticket_number, payload):
+        """Encola una escritura en el diario local y la confirma al usuario sin esperar al servidor."""
+        try:
+            self.journal.append(operation, ticket_number, payload)
+        except sqlite3.Error as e:
+            return False, f"No se pudo guardar en el diario local: {e}"
+        return True, f"Ticket {ticket_number}: cambio guardado, se enviará al servidor en segundo plano."
+
     def add_employee(self, employee_name):
         if not employee_name.strip():
             return False, "El nombre no puede estar vacío."
@@ -84,67 +317,199 @@ class TaskTrackingSystem:
              return False, f"El empleado {employee_name} ya existe."
 
     def get_employees(self):
-        return self._execute_query("SELECT nombre FROM empleados ORDER BY nombre", fetch='all')
+        rows = self._execute_query("SELECT nombre FROM empleados ORDER BY nombre", fetch='all')
+        if self.journal:
+            # Se guarda una copia local para poder asignar tickets aunque el servidor no responda
+            if rows is not None:
+                self.journal.save_employees([row[0] for row in rows])
+            else:
+                rows = [(name,) for name in self.journal.cached_employees()]
+        return rows
 
     def assign_ticket(self, ticket_number, employee_name, task_type, received_time):
         if not all([ticket_number, employee_name, task_type, received_time]):
             return False, "Todos los campos son requeridos."
 
+        if self.journal:
+            # Se rechazan ya los duplicados conocidos localmente; los que solo el servidor
+            # conoce (p. ej. tickets completados) se detectan al enviar y quedan como conflicto
+            if any(row[0] == ticket_number for row in self._open_ticket_rows(refresh=False)):
+                return False, f"El ticket {ticket_number} ya existe."
+            payload = {"employee_name": employee_name, "task_type": task_type,
+                       "received_time": received_time.isoformat()}
+            return self._journal_write("assign", ticket_number, payload)
+
         # 1. Obtener el ID del empleado
         employee_id_result = self._execute_query("SELECT id FROM empleados WHERE nombre = ?", (employee_name,), fetch='one')
         if not employee_id_result:
             return False, f"Empleado '{employee_name}' no encontrado."
         employee_id = employee_id_result[0]
 
-        # 2. Calcular fecha de finalización esperada
-        sla_hours = self.task_types.get(task_type, 0)
-        expected_completion = received_time + datetime.timedelta(hours=sla_hours)
-
-        # 3. Insertar el ticket
-        sql = """
-        INSERT INTO tickets (ticket_number, employee_id, task_type, received_time, expected_completion, status)
-        VALUES (?, ?, ?, ?, ?, 'Open')
-        """
-        params = (ticket_number, employee_id, task_type, received_time, expected_completion)
-        success = self._execute_query(sql, params, is_commit=True)
+        # 2. Insertar el ticket (con su fecha de finalización esperada) y su aporte al resumen
+        insert = self._insert_ticket_statement(ticket_number, employee_id, task_type, received_time)
+        summary = self._summary_delta_statement(
+            received_time, employee_id, task_type, self._summary_contribution("Open"))
+        success = self._execute_transaction([insert, summary])
         if success:
             return True, f"Ticket {ticket_number} asignado."
         return False, "Fallo al asignar ticket (posiblemente el número de ticket ya existe)."
 
     def complete_ticket(self, ticket_number, completion_time):
-        # Obtener ticket para calcular retraso
-        ticket_query = """
-        SELECT t.expected_completion FROM tickets t WHERE t.ticket_number = ?
-        """
-        ticket = self._execute_query(ticket_query, (ticket_number,), fetch='one')
-        if not ticket:
-            return False, "Ticket no encontrado."
+        if self.journal:
+            # El modelo de riesgo se actualiza ya, con la fecha de recepción de la copia local
+            row = next((row for row in self._open_ticket_rows(refresh=False) if row[0] == ticket_number), None)
+            success, message = self._journal_write(
+                "complete", ticket_number, {"completion_time": completion_time.isoformat()})
+            if success and row:
+                duration_hours = (completion_time - row[3]).total_seconds() / 3600
+                self.risk_model.observe(row[1], row[2], duration_hours)
+            return success, message
+
+        # Si otro cliente cambia el ticket entre la lectura y la escritura, se relee y reintenta
+        for _ in range(3):
+            # Obtener ticket para calcular retraso
+            ticket_query = """
+            SELECT t.expected_completion, t.employee_id, t.task_type, t.received_time, t.status, t.delay_hours
+            FROM tickets t WHERE t.ticket_number = ?
+            """
+            ticket = self._execute_query(ticket_query, (ticket_number,), fetch='one')
+            if not ticket:
+                return False, "Ticket no encontrado."
+
+            expected_completion, employee_id, task_type, received_time, old_status, old_delay = ticket
+            status, delay_hours = self._completion_status(expected_completion, completion_time)
+
+            # Actualizar ticket
+            update = self._complete_ticket_statement(
+                ticket_number, completion_time, status, delay_hours, old_status, old_delay)
+            deltas = self._summary_change(
+                self._summary_contribution(old_status, old_delay),
+                self._summary_contribution(status, delay_hours))
+            summary = self._summary_delta_statement(received_time, employee_id, task_type, deltas)
+            try:
+                success = self._execute_transaction([update, summary])
+            except StaleTicketError:
+                continue
+            if success:
+                if old_status in ("Open", "Overdue"):
+                    duration_hours = (completion_time - received_time).total_seconds() / 3600
+                    self.risk_model.observe(employee_id, task_type, duration_hours)
+                return True, f"Ticket {ticket_number} completado."
+            return False, "Fallo al completar el ticket."
+        return False, f"El ticket {ticket_number} cambió mientras se completaba; intente de nuevo."
 
-        expected_completion = ticket[0]
-        delay_hours = 0
-        status = "Completed On Time"
-        if completion_time > expected_completion:
-            delay_seconds = (completion_time - expected_completion).total_seconds()
-            delay_hours = round(delay_seconds / 3600, 2)
-            status = "Completed Late"
+    def get_open_tickets(self):
+        sql = "SELECT ticket_number FROM tickets WHERE status IN ('Open', 'Overdue') ORDER BY received_time"
+        return self._execute_query(sql, fetch='all')
 
-        # Actualizar ticket
+    def _ensure_risk_model(self):
+        """Carga (o recarga si está vencida) la caché de parámetros del modelo de riesgo."""
+        if not self.risk_model.is_stale():
+            return
+        # Un solo agregado por (empleado, tipo de tarea) sobre los tickets completados; el CASE
+        # protege LOG porque SQL Server no garantiza evaluar el WHERE antes que la proyección
         sql = """
-        UPDATE tickets 
-        SET actual_completion = ?, status = ?, delay_hours = ? 
-        WHERE ticket_number = ?
+        SELECT employee_id, task_type, COUNT(*),
+               SUM(LOG(CASE WHEN DATEDIFF(SECOND, received_time, actual_completion) > 0 THEN DATEDIFF(SECOND, received_time, actual_completion) / 3600.0 END)),
+               SUM(SQUARE(LOG(CASE WHEN DATEDIFF(SECOND, received_time, actual_completion) > 0 THEN DATEDIFF(SECOND, received_time, actual_completion) / 3600.0 END)))
+        FROM tickets
+        WHERE actual_completion IS NOT NULL AND DATEDIFF(SECOND, received_time, actual_completion) > 0
+        GROUP BY employee_id, task_type
         """
-        params = (completion_time, status, delay_hours, ticket_number)
-        success = self._execute_query(sql, params, is_commit=True)
-        if success:
-            return True, f"Ticket {ticket_number} completado."
-        return False, "Fallo al completar el ticket."
+        rows = self._execute_query(sql, fetch='all')
+        if rows is not None:
+            self.risk_model.load(rows)
 
-    def get_open_tickets(self):
-        sql = "SELECT ticket_number FROM tickets WHERE status IN ('Open', 'Overdue') ORDER BY received_time"
-        return self._execute_query(sql, fetch='all')
+    def _open_ticket_rows(self, refresh=True):
+        """Tickets abiertos como (ticket_number, employee_id, task_type, received_time,
+        expected_completion, empleado, estado).
+
+        Con refresh=False no se consulta el servidor y se usa la última copia. En modo
+        write-behind, si el servidor no responde también se usa la copia, y encima se aplican
+        las entradas ya enviadas que ella no incluye y las del diario aún no enviadas.
+        """
+        if refresh or self._open_rows is None:
+            # Lo enviado antes de esta lectura queda incluido en ella; lo enviado durante la
+            # lectura puede no estarlo y se sigue aplicando encima (las entradas son idempotentes)
+            with self._replayed_lock:
+                replayed_before = len(self._replayed_entries)
+            sql = """
+            SELECT t.ticket_number, t.employee_id, t.task_type, t.received_time, t.expected_completion,
+                   e.nombre, t.status
+            FROM tickets t JOIN empleados e ON t.employee_id = e.id
+            WHERE t.status IN ('Open', 'Overdue')
+            """
+            rows = self._execute_query(sql, fetch='all')
+            if rows is not None:
+                with self._replayed_lock:
+                    self._open_rows = [tuple(row) for row in rows]
+                    del self._replayed_entries[:replayed_before]
+                self.open_rows_loaded_at = datetime.datetime.now()
+            elif not self.journal:
+                return None
+        rows = list(self._open_rows or [])
+        if not self.journal:
+            return rows
+
+        # Las enviadas se leen antes que el diario: una entrada recién enviada puede aparecer
+        # en ambas listas, pero nunca en ninguna (ver note_replayed_entries)
+        with self._replayed_lock:
+            overlay = [(entry, "Open") for entry in self._replayed_entries]
+        overlay += [(entry, "Pendiente de envío") for entry in self.journal.pending()]
+
+        by_number = {row[0]: row for row in rows}
+        for (_, operation, ticket_number, payload), status in overlay:
+            if operation == "assign":
+                received_time = datetime.datetime.fromisoformat(payload["received_time"])
+                expected_completion = received_time + datetime.timedelta(
+                    hours=self.task_types.get(payload["task_type"], 0))
+                # Sin servidor no se conoce el id del empleado: el modelo de riesgo usa el del tipo de tarea
+                by_number.setdefault(ticket_number, (
+                    ticket_number, -1, payload["task_type"], received_time, expected_completion,
+                    payload["employee_name"], status))
+            else:
+                by_number.pop(ticket_number, None)
+        return list(by_number.values())
+
+    def note_replayed_entries(self, entries):
+        """El replicador avisa de entradas ya aplicadas en el servidor, antes de quitarlas del diario."""
+        with self._replayed_lock:
+            self._replayed_entries.extend(entries)
+
+    def get_open_tickets_by_risk(self, now=None, refresh=True):
+        """Tickets abiertos ordenados de mayor a menor riesgo de incumplir el SLA.
+
+        Devuelve una lista de (ticket_number, riesgo) con el riesgo entre 0 y 1; a igual
+        riesgo (p. ej. los ya vencidos) va primero el de fecha esperada más temprana.
+        Con refresh=False se calcula sin consultar el servidor (ver _open_ticket_rows).
+        """
+        rows = self._open_ticket_rows(refresh)
+        if rows is None:
+            return None
+        if not rows:
+            return []
+        if refresh:
+            self._ensure_risk_model()
+
+        now = now or datetime.datetime.now()
+        df = pd.DataFrame.from_records(
+            rows,
+            columns=["ticket_number", "employee_id", "task_type", "received_time", "expected_completion",
+                     "employee_name", "status"])
+        elapsed_hours = (now - df["received_time"]).dt.total_seconds().to_numpy() / 3600
+        deadline_hours = (df["expected_completion"] - df["received_time"]).dt.total_seconds().to_numpy() / 3600
+        df["risk"] = self.risk_model.score(
+            df["employee_id"].to_numpy(), df["task_type"].to_numpy(), elapsed_hours, deadline_hours)
+
+        df = df.sort_values(["risk", "expected_completion"], ascending=[False, True])
+        return list(zip(df["ticket_number"], df["risk"].astype(float)))
 
     def get_ticket_details(self, ticket_number):
+        if self.journal:
+            # Los abiertos se muestran desde la copia local, sin esperar al servidor
+            for row in self._open_ticket_rows(refresh=False):
+                if row[0] == ticket_number:
+                    return (row[0], row[5], row[2], row[3], row[4], row[6])
         sql = """
         SELECT t.ticket_number, e.nombre, t.task_type, t.received_time, 
                t.expected_completion, t.status
@@ -153,10 +518,37 @@ class TaskTrackingSystem:
         """
         return self._execute_query(sql, (ticket_number,), fetch='one')
         
+    def _mark_overdue_tickets(self):
+        # Actualizar estado de tickets a "Overdue" si aplica y, en el mismo lote, mover sus
+        # contadores de open_count a overdue_count en el resumen. El UPDATE va primero y solo
+        # bloquea las filas que cambia; el MERGE agrupa lo que devolvió su OUTPUT.
+        overdue_sql = """
+        SET NOCOUNT ON;
+        DECLARE @moved TABLE (received_time DATETIME, employee_id INT, task_type NVARCHAR(100));
+        UPDATE tickets SET status = 'Overdue'
+        OUTPUT inserted.received_time, inserted.employee_id, inserted.task_type INTO @moved
+        WHERE status = 'Open' AND expected_completion < GETDATE();
+        MERGE sla_daily_summary WITH (HOLDLOCK) AS s
+        USING (
+            SELECT CAST(received_time AS DATE) AS summary_date, employee_id, task_type, COUNT(*) AS n
+            FROM @moved
+            GROUP BY CAST(received_time AS DATE), employee_id, task_type
+        ) AS src
+        ON s.summary_date = src.summary_date AND s.employee_id = src.employee_id AND s.task_type = src.task_type
+        WHEN MATCHED THEN UPDATE SET open_count = s.open_count - src.n, overdue_count = s.overdue_count + src.n
+        WHEN NOT MATCHED THEN INSERT (summary_date, employee_id, task_type, open_count, overdue_count)
+            VALUES (src.summary_date, src.employee_id, src.task_type, -src.n, src.n);
+        """
+        try:
+            self._execute_transaction([(overdue_sql, ())])
+        except pyodbc.Error:
+            # Solo llegan aquí con show_errors=False (modo write-behind sin servidor):
+            # el reporte sigue sin marcar los vencidos
+            if self.show_errors:
+                raise
+
     def generate_report_data(self):
-        # Actualizar estado de tickets a "Overdue" si aplica
-        overdue_sql = "UPDATE tickets SET status = 'Overdue' WHERE status = 'Open' AND expected_completion < GETDATE()"
-        self._execute_query(overdue_sql, is_commit=True)
+        self._mark_overdue_tickets()
 
         # Obtener datos para el reporte
         report_sql = """
@@ -172,20 +564,424 @@ class TaskTrackingSystem:
         if not ticket_number:
             return False, "No se seleccionó ningún número de ticket."
 
-        # La sentencia SQL DELETE es simple: borra de la tabla 'tickets'
-        # donde el 'ticket_number' coincida [2][4][5].
-        # La cláusula WHERE es CRUCIAL para no borrar toda la tabla.
-        query = "DELETE FROM tickets WHERE ticket_number = ?"
-    
-        success = self._execute_query(query, (ticket_number,), is_commit=True)
-    
-        if success:
-            return True, f"Ticket {ticket_number} borrado exitosamente."
+        if self.journal:
+            return self._journal_write("delete", ticket_number, {})
+
+        for _ in range(3):
+            # Se necesita el estado actual del ticket para descontarlo del resumen diario
+            ticket = self._execute_query(
+                "SELECT employee_id, task_type, received_time, status, delay_hours FROM tickets WHERE ticket_number = ?",
+                (ticket_number,), fetch='one')
+            if not ticket:
+                return False, "Ticket no encontrado."
+            employee_id, task_type, received_time, status, delay_hours = ticket
+            deltas = self._summary_change(self._summary_contribution(status, delay_hours), None)
+            summary = self._summary_delta_statement(received_time, employee_id, task_type, deltas)
+
+            # La sentencia SQL DELETE borra de la tabla 'tickets' donde el 'ticket_number' coincida [2][4][5].
+            delete = self._delete_ticket_statement(ticket_number, status, delay_hours)
+            try:
+                success = self._execute_transaction([delete, summary])
+            except StaleTicketError:
+                continue
+
+            if success:
+                return True, f"Ticket {ticket_number} borrado exitosamente."
+            else:
+                return False, f"Fallo al borrar el ticket {ticket_number}."
+        return False, f"El ticket {ticket_number} cambió mientras se borraba; intente de nuevo."
+
+    def journal_employee_ids(self, cursor, entries):
+        """{nombre: id} de los empleados que nombran las asignaciones de un lote, en una sola consulta."""
+        names = sorted({payload["employee_name"] for _, operation, _, payload in entries if operation == "assign"})
+        if not names:
+            return {}
+        cursor.execute(f"SELECT nombre, id FROM empleados WHERE nombre IN ({', '.join('?' for _ in names)})", names)
+        return {name: employee_id for name, employee_id in cursor.fetchall()}
+
+    def replay_journal_entry(self, cursor, operation, ticket_number, payload, employee_ids):
+        """Aplica una entrada del diario local usando el cursor (y la transacción) del replicador.
+
+        employee_ids viene de journal_employee_ids para el lote. Es idempotente: si la entrada ya se aplicó en un envío anterior no vuelve a hacerlo.
+        Devuelve None si el servidor quedó como indica la entrada, o el motivo del conflicto
+        si el ticket_number ya tiene en el servidor datos incompatibles con ella.
+        """
+        cursor.execute("""
+        SELECT employee_id, task_type, received_time, expected_completion, actual_completion, status, delay_hours
+        FROM tickets WITH (UPDLOCK, HOLDLOCK) WHERE ticket_number = ?
+        """, (ticket_number,))
+        ticket = cursor.fetchone()
+
+        if operation == "assign":
+            received_time = datetime.datetime.fromisoformat(payload["received_time"])
+            employee_id = employee_ids.get(payload["employee_name"])
+            if employee_id is None:
+                return f"Empleado '{payload['employee_name']}' no encontrado."
+            if ticket:
+                if (ticket[0], ticket[1], ticket[2]) == (employee_id, payload["task_type"], received_time):
+                    return None  # Ya enviado antes (p. ej. se cortó la conexión antes de confirmar)
+                return f"El ticket {ticket_number} ya existe en el servidor con otros datos."
+            statements = [
+                self._insert_ticket_statement(ticket_number, employee_id, payload["task_type"], received_time),
+                self._summary_delta_statement(
+                    received_time, employee_id, payload["task_type"], self._summary_contribution("Open")),
+            ]
+
+        elif operation == "complete":
+            if not ticket:
+                return f"El ticket {ticket_number} no existe en el servidor."
+            employee_id, task_type, received_time, expected_completion, actual_completion, old_status, old_delay = ticket
+            completion_time = datetime.datetime.fromisoformat(payload["completion_time"])
+            if old_status in ("Completed On Time", "Completed Late"):
+                if actual_completion == completion_time:
+                    return None
+                return f"El ticket {ticket_number} ya fue completado en el servidor con otra fecha."
+            status, delay_hours = self._completion_status(expected_completion, completion_time)
+            deltas = self._summary_change(
+                self._summary_contribution(old_status, old_delay),
+                self._summary_contribution(status, delay_hours))
+            statements = [
+                self._complete_ticket_statement(
+                    ticket_number, completion_time, status, delay_hours, old_status, old_delay),
+                self._summary_delta_statement(received_time, employee_id, task_type, deltas),
+            ]
+
+        elif operation == "delete":
+            if not ticket:
+                return None
+            employee_id, task_type, received_time, _, _, status, delay_hours = ticket
+            deltas = self._summary_change(self._summary_contribution(status, delay_hours), None)
+            statements = [
+                self._delete_ticket_statement(ticket_number, status, delay_hours),
+                self._summary_delta_statement(received_time, employee_id, task_type, deltas),
+            ]
+
         else:
-            return False, f"Fallo al borrar el ticket {ticket_number}."
+            return f"Operación desconocida en el diario: {operation}"
+
+        for statement in statements:
+            cursor.execute(statement[0], statement[1])
+            if len(statement) > 2 and statement[2] and cursor.rowcount == 0:
+                raise StaleTicketError(statement[0])
+        return None
 
 # ----------------------------------------------------------------
-# 4. INTERFAZ GRÁFICA (FRONTEND) - CLASE TaskTrackingGUI
+# 4. DIARIO LOCAL DE ESCRITURAS (MODO WRITE-BEHIND)
+# ----------------------------------------------------------------
+class WriteBehindJournal:
+    """Cola durable en SQLite con las escrituras pendientes de enviar a SQL Server."""
+
+    def __init__(self, path):
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS journal (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                operation TEXT NOT NULL,
+                ticket_number TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                error TEXT
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_journal_status ON journal (status, id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS employee_cache (nombre TEXT PRIMARY KEY)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # WAL + synchronous=FULL: una escritura confirmada sobrevive a un corte de luz
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        return conn
+
+    def append(self, operation, ticket_number, payload):
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "INSERT INTO journal (operation, ticket_number, payload, created_at) VALUES (?, ?, ?, ?)",
+                (operation, ticket_number, json.dumps(payload), datetime.datetime.now().isoformat()))
+            conn.commit()
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def pending(self, limit=-1):
+        """Primeras `limit` entradas pendientes (todas por defecto), en el orden en que se escribieron."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id, operation, ticket_number, payload FROM journal WHERE status = 'pending' ORDER BY id LIMIT ?",
+                (limit,)).fetchall()
+        finally:
+            conn.close()
+        return [(entry_id, operation, ticket_number, json.loads(payload))
+                for entry_id, operation, ticket_number, payload in rows]
+
+    def save_employees(self, names):
+        """Reemplaza la copia local de la lista de empleados."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM employee_cache")
+            conn.executemany("INSERT INTO employee_cache (nombre) VALUES (?)", [(name,) for name in names])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def cached_employees(self):
+        conn = self._connect()
+        try:
+            return [row[0] for row in conn.execute("SELECT nombre FROM employee_cache ORDER BY nombre")]
+        finally:
+            conn.close()
+
+    def pending_count(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM journal WHERE status = 'pending'").fetchone()[0]
+        finally:
+            conn.close()
+
+    def conflict_count(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM journal WHERE status = 'conflict'").fetchone()[0]
+        finally:
+            conn.close()
+
+    def discard_conflicts(self, entry_ids):
+        """Borra entradas en conflicto que el usuario ya revisó."""
+        conn = self._connect()
+        try:
+            conn.executemany("DELETE FROM journal WHERE id = ? AND status = 'conflict'",
+                             [(entry_id,) for entry_id in entry_ids])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_conflicts(self):
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT id, operation, ticket_number, payload, created_at, error FROM journal "
+                "WHERE status = 'conflict' ORDER BY id").fetchall()
+        finally:
+            conn.close()
+
+    def mark_done(self, entry_ids):
+        """Quita del diario las entradas ya aplicadas en el servidor."""
+        if not entry_ids:
+            return
+        conn = self._connect()
+        try:
+            conn.executemany("DELETE FROM journal WHERE id = ?", [(entry_id,) for entry_id in entry_ids])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def mark_conflict(self, entry_id, ticket_number, reason):
+        """Aparta una entrada en conflicto junto con las posteriores del mismo ticket, que dependen de ella."""
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE journal SET status = 'conflict', error = ? WHERE id = ?", (reason, entry_id))
+            conn.execute(
+                "UPDATE journal SET status = 'conflict', error = ? "
+                "WHERE status = 'pending' AND ticket_number = ? AND id > ?",
+                (f"Depende de la entrada {entry_id}, que está en conflicto.", ticket_number, entry_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def _is_transient_error(error):
+    """True si el error se resuelve reintentando más tarde (red, deadlock, timeout de bloqueo)."""
+    if isinstance(error, StaleTicketError):
+        return True
+    sqlstate = str(error.args[0]) if error.args else ""
+    text = str(error)
+    return (sqlstate.startswith("08") or sqlstate in ("40001", "HYT00", "HYT01")
+            or "(1205)" in text or "(1222)" in text)
+
+
+class JournalReplayer(threading.Thread):
+    """Hilo en segundo plano que envía al servidor, por lotes, las entradas pendientes del diario."""
+
+    def __init__(self, tracker, interval_seconds=5, batch_size=50):
+        super().__init__(daemon=True)
+        self.tracker = tracker
+        self.journal = tracker.journal
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.sent_count = 0  # Entradas resueltas desde el arranque; la GUI lo vigila para refrescar
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            # Mientras haya lotes completos se siguen enviando sin esperar
+            while self.replay_batch() == self.batch_size and not self._stop_event.is_set():
+                pass
+            self._stop_event.wait(self.interval_seconds)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def replay_batch(self):
+        """Envía un lote pendiente. Devuelve cuántas entradas quedaron resueltas (aplicadas o en conflicto).
+
+        Cada entrada va en su propia transacción: los bloqueos sobre tickets y sobre las filas del
+        resumen duran lo que tarda una entrada, no el lote. Del lote solo se comparten la lectura
+        del diario, la conexión y la consulta de empleados.
+        """
+        entries = self.journal.pending(self.batch_size)
+        if not entries:
+            return 0
+        conn = get_db_connection(show_errors=False)
+        if not conn:
+            return 0  # Servidor inaccesible: se reintenta en el siguiente ciclo
+
+        resolved, conflicted = 0, set()
+        try:
+            cursor = conn.cursor()
+            try:
+                employee_ids = self.tracker.journal_employee_ids(cursor, entries)
+            except pyodbc.Error:
+                return 0
+            for entry in entries:
+                entry_id, operation, ticket_number, payload = entry
+                if ticket_number in conflicted:
+                    resolved += 1  # mark_conflict ya apartó esta entrada
+                    continue
+                try:
+                    reason = self.tracker.replay_journal_entry(cursor, operation, ticket_number, payload, employee_ids)
+                    conn.commit()
+                except (pyodbc.Error, StaleTicketError) as e:
+                    try:
+                        conn.rollback()
+                    except pyodbc.Error:
+                        pass  # Se cortó la conexión: el servidor ya deshizo la transacción
+                    if _is_transient_error(e):
+                        # Esta y las siguientes quedan pendientes; como replay_journal_entry es
+                        # idempotente, reenviarlas es seguro
+                        break
+                    # Un error permanente (truncamiento, restricción...) aparta solo esta entrada
+                    reason = f"Error del servidor: {e}"
+                if reason:
+                    self.journal.mark_conflict(entry_id, ticket_number, reason)
+                    conflicted.add(ticket_number)
+                else:
+                    self.tracker.note_replayed_entries([entry])
+                    self.journal.mark_done([entry_id])
+                    self.sent_count += 1
+                resolved += 1
+        finally:
+            conn.close()
+        return resolved
+
+# ----------------------------------------------------------------
+# 5. MODELO DE RIESGO DE INCUMPLIMIENTO DE SLA
+# ----------------------------------------------------------------
+def _normal_log_sf(z):
+    """ln(1 - Φ(z)) vectorizado, sin underflow en la cola.
+
+    Usa erfc(x) = t·exp(-x² + P(t)) con t = 1 / (1 + x/2) (erfcc de Numerical Recipes), cuyo
+    error relativo es < 1.2e-7 para todo x >= 0; como la forma ya es exponencial, el
+    logaritmo de la cola se obtiene directamente aunque 1 - Φ(z) no quepa en un float.
+    """
+    x = np.abs(z) / math.sqrt(2)
+    t = 1 / (1 + 0.5 * x)
+    poly = -1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (-0.18628806 + t * (
+        0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277))))))))
+    log_tail = math.log(0.5) + np.log(t) - x * x + poly  # ln(1 - Φ(|z|))
+    return np.where(z >= 0, log_tail, np.log1p(-np.exp(log_tail)))
+
+
+class BreachRiskModel:
+    """Tiempo de resolución (actual_completion - received_time) log-normal por empleado y tipo de tarea.
+
+    Guarda solo estadísticos suficientes (n, suma de ln(h), suma de ln(h)²) por grupo, así que
+    cada ticket completado se incorpora en O(1). Si un (empleado, tarea) tiene pocos datos
+    se usa el del tipo de tarea y, si tampoco, el global.
+    """
+    MIN_SAMPLES = 5
+    MIN_SIGMA = 0.1  # Evita distribuciones degeneradas cuando todos los tiempos son iguales
+    MAX_AGE = datetime.timedelta(hours=1)  # Recarga periódica para incluir lo cerrado por otros clientes
+
+    def __init__(self):
+        self._stats = {}
+        self.loaded_at = None
+
+    def is_stale(self):
+        return self.loaded_at is None or datetime.datetime.now() - self.loaded_at > self.MAX_AGE
+
+    @staticmethod
+    def _keys(employee_id, task_type):
+        return ((employee_id, task_type), (None, task_type), (None, None))
+
+    def load(self, rows):
+        """Reemplaza la caché con filas (employee_id, task_type, n, suma ln(h), suma ln(h)²)."""
+        stats = {}
+        for employee_id, task_type, n, sum_log, sum_log_sq in rows:
+            for key in self._keys(employee_id, task_type):
+                acc = stats.setdefault(key, [0, 0.0, 0.0])
+                acc[0] += n
+                acc[1] += float(sum_log)
+                acc[2] += float(sum_log_sq)
+        self._stats = stats
+        self.loaded_at = datetime.datetime.now()
+
+    def observe(self, employee_id, task_type, duration_hours):
+        """Incorpora un ticket recién completado sin volver a consultar la base."""
+        if duration_hours <= 0:
+            return
+        log_hours = math.log(duration_hours)
+        for key in self._keys(employee_id, task_type):
+            acc = self._stats.setdefault(key, [0, 0.0, 0.0])
+            acc[0] += 1
+            acc[1] += log_hours
+            acc[2] += log_hours * log_hours
+
+    def params(self, employee_id, task_type):
+        """(mu, sigma) de ln(horas) para el grupo, o (nan, nan) si no hay historial suficiente."""
+        for key in self._keys(employee_id, task_type):
+            acc = self._stats.get(key)
+            if acc and acc[0] >= self.MIN_SAMPLES:
+                n, sum_log, sum_log_sq = acc
+                mu = sum_log / n
+                variance = max(sum_log_sq - n * mu * mu, 0.0) / (n - 1)
+                return mu, max(math.sqrt(variance), self.MIN_SIGMA)
+        return math.nan, math.nan
+
+    def score(self, employee_ids, task_types, elapsed_hours, deadline_hours):
+        """Probabilidad de incumplir el SLA de cada ticket abierto, en una sola pasada vectorizada.
+
+        Es P(D > plazo | D > transcurrido) = sf(plazo) / sf(transcurrido) con D log-normal,
+        calculado en escala logarítmica para que un ticket lejos de la cola de su distribución
+        no dé un cociente 0/0; solo vale 1 para los tickets que ya pasaron su plazo.
+        """
+        # Los parámetros se buscan una vez por grupo distinto, no por ticket
+        codes, groups = pd.factorize(pd.MultiIndex.from_arrays([employee_ids, task_types]))
+        group_params = np.array([self.params(e, t) for e, t in groups], dtype=float).reshape(-1, 2)
+        mu, sigma = group_params[codes, 0], group_params[codes, 1]
+
+        # Sin historial: se asume una mediana de la mitad del plazo y dispersión amplia
+        deadline_hours = np.maximum(deadline_hours, 1e-3)
+        no_history = np.isnan(mu)
+        mu = np.where(no_history, np.log(deadline_hours / 2), mu)
+        sigma = np.where(no_history, 1.0, sigma)
+
+        elapsed_hours = np.maximum(elapsed_hours, 1e-3)
+        log_sf_deadline = _normal_log_sf((np.log(deadline_hours) - mu) / sigma)
+        log_sf_elapsed = _normal_log_sf((np.log(elapsed_hours) - mu) / sigma)
+        risk = np.exp(np.minimum(log_sf_deadline - log_sf_elapsed, 0.0))
+        risk = np.where(elapsed_hours >= deadline_hours, 1.0, risk)
+        return np.clip(risk, 0.0, 1.0)
+
+# ----------------------------------------------------------------
+# 6. INTERFAZ GRÁFICA (FRONTEND) - CLASE TaskTrackingGUI
 # ----------------------------------------------------------------
 class TaskTrackingGUI:
     def __init__(self, root):
@@ -194,10 +990,18 @@ class TaskTrackingGUI:
         self.root.geometry("950x700")
         self.root.minsize(950, 700)
         
-        self.tracker = TaskTrackingSystem()
+        self.tracker = TaskTrackingSystem(journal_path=WRITE_BEHIND_JOURNAL)
+        self.replayer = None
+        if self.tracker.journal:
+            self.replayer = JournalReplayer(self.tracker)
+            self.replayer.start()
+        self.ticket_risk = {}  # ticket_number -> riesgo de incumplir el SLA (pestaña Completar)
+        self._last_sent_count = 0
         
         self.setup_ui()
         self.initial_load()
+        if self.replayer:
+            self.root.after(JOURNAL_POLL_MS, self.poll_journal)
 
     def setup_ui(self):
         # COPIA TU CÓDIGO DE UI (PESTAÑAS, BOTONES, ETC.) AQUÍ
@@ -235,6 +1039,16 @@ class TaskTrackingGUI:
         # BOTÓN DE SALIR (FUNCIONAL)
         exit_btn = ttk.Button(bottom_frame, text="Salir", command=self.confirm_exit)
         exit_btn.pack(side=tk.RIGHT)
+
+        # Estado del diario local (solo en modo write-behind)
+        self.journal_var = tk.StringVar(value="")
+        self._last_conflict_count = 0
+        if self.tracker.journal:
+            conflicts_btn = ttk.Button(bottom_frame, text="Ver conflictos", command=self.show_journal_conflicts)
+            conflicts_btn.pack(side=tk.RIGHT, padx=5)
+            journal_label = ttk.Label(bottom_frame, textvariable=self.journal_var, relief=tk.SUNKEN, anchor=tk.W)
+            journal_label.pack(side=tk.RIGHT, padx=5)
+            self.update_journal_status()
         
     def setup_employee_tab(self):
         # ... (El resto de la configuración de la UI es casi idéntica a tu código `paste.txt`)
@@ -428,8 +1242,7 @@ class TaskTrackingGUI:
             self.status_var.set(message)
             # Limpiar campos
             self.ticket_number_entry.delete(0, tk.END)
-            self.refresh_open_ticket_list() # Actualizar lista de tickets a completar
-            self.refresh_report() # Actualizar reporte
+            self.refresh_after_write() # Actualizar lista de tickets a completar y reporte
         else:
             messagebox.showerror("Error", message)
 
@@ -451,8 +1264,7 @@ class TaskTrackingGUI:
         success, message = self.tracker.complete_ticket(ticket_num, completion_time)
         if success:
             self.status_var.set(message)
-            self.refresh_open_ticket_list()
-            self.refresh_report()
+            self.refresh_after_write()
             self.detail_text.config(state=tk.NORMAL)
             self.detail_text.delete(1.0, tk.END)
             self.detail_text.config(state=tk.DISABLED)
@@ -490,8 +1302,7 @@ class TaskTrackingGUI:
             self.detail_text.config(state=tk.DISABLED)
         
         # Es VITAL refrescar las listas para que el ticket borrado desaparezca de la UI.
-            self.refresh_open_ticket_list()
-            self.refresh_report()
+            self.refresh_after_write()
             messagebox.showinfo("Éxito", message)
         else:
             messagebox.showerror("Error", message)
@@ -510,8 +1321,81 @@ class TaskTrackingGUI:
         if employee_names:
             self.employee_combo.current(0)
 
-    def refresh_open_ticket_list(self):
-        open_tickets_raw = self.tracker.get_open_tickets()
+    def refresh_after_write(self):
+        """Refresca las vistas tras asignar, completar o borrar.
+
+        En modo write-behind no se espera al servidor: la lista de abiertos se recalcula con la
+        copia local y el diario, y poll_journal refresca todo cuando el replicador envía cambios.
+        """
+        if self.tracker.journal:
+            self.refresh_open_ticket_list(refresh=False)
+            self.update_journal_status()
+        else:
+            self.refresh_open_ticket_list()
+            self.refresh_report()
+
+    def poll_journal(self):
+        """Refresca desde el servidor cuando el replicador ha enviado cambios (señal de que responde).
+
+        Si la lectura falla se reintenta en el siguiente ciclo; mientras tanto la lista local
+        ya refleja lo enviado.
+        """
+        sent_count = self.replayer.sent_count
+        if sent_count != self._last_sent_count and self.refresh_open_ticket_list():
+            self._last_sent_count = sent_count
+            self.refresh_report()
+        self.update_journal_status()
+        self.root.after(JOURNAL_POLL_MS, self.poll_journal)
+
+    def update_journal_status(self):
+        """Muestra pendientes y conflictos del diario; avisa cuando aparece un conflicto nuevo."""
+        pending = self.tracker.journal.pending_count()
+        conflicts = self.tracker.journal.conflict_count()
+        self.journal_var.set(f"Pendientes: {pending} | Conflictos: {conflicts}")
+        if conflicts > self._last_conflict_count:
+            self.status_var.set("Hay cambios que el servidor rechazó. Revíselos en 'Ver conflictos'.")
+        self._last_conflict_count = conflicts
+
+    def show_journal_conflicts(self):
+        """Lista los cambios que no se pudieron aplicar en el servidor y permite descartarlos."""
+        window = tk.Toplevel(self.root)
+        window.title("Cambios en conflicto")
+        window.geometry("850x350")
+
+        cols = ("Entrada", "Operación", "Ticket", "Guardado", "Motivo")
+        tree = ttk.Treeview(window, columns=cols, show="headings")
+        for col in cols:
+            tree.heading(col, text=col)
+        tree.column("Entrada", width=60)
+        tree.column("Operación", width=80)
+        tree.column("Motivo", width=400)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        for entry_id, operation, ticket_number, _, created_at, error in self.tracker.journal.get_conflicts():
+            tree.insert('', 'end', iid=str(entry_id), values=(entry_id, operation, ticket_number, created_at[:16], error))
+
+        def discard_selected():
+            selected = tree.selection()
+            if not selected:
+                return
+            if not messagebox.askyesno("Descartar", f"¿Descartar {len(selected)} cambios? No se enviarán al servidor.",
+                                       parent=window):
+                return
+            self.tracker.journal.discard_conflicts([int(iid) for iid in selected])
+            for iid in selected:
+                tree.delete(iid)
+            self.update_journal_status()
+
+        buttons = ttk.Frame(window)
+        buttons.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(buttons, text="Cerrar", command=window.destroy).pack(side=tk.RIGHT)
+        ttk.Button(buttons, text="Descartar seleccionados", command=discard_selected).pack(side=tk.RIGHT, padx=10)
+
+    def refresh_open_ticket_list(self, refresh=True):
+        """Recarga la lista de la pestaña Completar. Devuelve True si se leyó del servidor."""
+        loaded_at = self.tracker.open_rows_loaded_at
+        # Los tickets con más riesgo de incumplir el SLA aparecen primero
+        open_tickets_raw = self.tracker.get_open_tickets_by_risk(refresh=refresh)
+        self.ticket_risk = dict(open_tickets_raw) if open_tickets_raw else {}
         open_tickets = [row[0] for row in open_tickets_raw] if open_tickets_raw else []
         self.complete_ticket_combo['values'] = open_tickets
         if open_tickets:
@@ -519,6 +1403,7 @@ class TaskTrackingGUI:
             self.show_ticket_details()
         else:
             self.complete_ticket_combo.set('')
+        return self.tracker.open_rows_loaded_at != loaded_at
 
 
     def show_ticket_details(self, event=None):
@@ -537,6 +1422,8 @@ class TaskTrackingGUI:
             f"Esperado: {details_raw[4].strftime('%Y-%m-%d %H:%M')}\n"
             f"Estado: {details_raw[5]}"
         )
+        if ticket_num in self.ticket_risk:
+            details_text += f"\nRiesgo de incumplir SLA: {self.ticket_risk[ticket_num]:.0%}"
         
         self.detail_text.config(state=tk.NORMAL)
         self.detail_text.delete(1.0, tk.END)
@@ -544,10 +1431,15 @@ class TaskTrackingGUI:
         self.detail_text.config(state=tk.DISABLED)
 
     def refresh_report(self):
+        report_data = self.tracker.generate_report_data()
+        if report_data is None and self.tracker.journal:
+            # Sin servidor en modo write-behind se conserva el último reporte mostrado
+            self.status_var.set("Servidor no disponible: el reporte muestra los últimos datos recibidos.")
+            return
+
         for item in self.report_tree.get_children():
             self.report_tree.delete(item)
         
-        report_data = self.tracker.generate_report_data()
         if report_data:
             for row in report_data:
                 # Formatear fechas para una mejor visualización
@@ -614,11 +1506,21 @@ class TaskTrackingGUI:
 
     def confirm_exit(self):
         """Función 'Exit'. Pide confirmación antes de cerrar."""
-        if messagebox.askyesno("Salir", "¿Estás seguro de que quieres salir de la aplicación?"):
+        message = "¿Estás seguro de que quieres salir de la aplicación?"
+        if self.tracker.journal:
+            pending = self.tracker.journal.pending_count()
+            if pending:
+                message += f"\n\nHay {pending} cambios pendientes de enviar al servidor; se enviarán al volver a abrir la aplicación."
+            conflicts = self.tracker.journal.conflict_count()
+            if conflicts:
+                message += f"\n\nHay {conflicts} cambios que el servidor rechazó y no se aplicaron (ver 'Ver conflictos')."
+        if messagebox.askyesno("Salir", message):
+            if self.replayer:
+                self.replayer.stop()
             self.root.destroy()
 
 # ----------------------------------------------------------------
-# 5. LÓGICA DE LOGIN (PUNTO DE ENTRADA)
+# 7. LÓGICA DE LOGIN (PUNTO DE ENTRADA)
 # ----------------------------------------------------------------
 def run_login():
     # Crea la ventana de login
@@ -729,7 +1631,17 @@ def open_main_window():
     main_root.mainloop()
 
 # ----------------------------------------------------------------
-# 6. INICIO DE LA APLICACIÓN
+# 8. INICIO DE LA APLICACIÓN
 # ----------------------------------------------------------------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Task Tracking System (SQL Server Edition)")
+    parser.add_argument("--rebuild-summary", action="store_true",
+                        help="Reconstruye la tabla sla_daily_summary desde tickets y termina (backfill).")
+    args = parser.parse_args()
+
+    if args.rebuild_summary:
+        # Sin ventana de Tk: los errores se imprimen en vez de mostrarse en diálogos
+        success, message = TaskTrackingSystem().rebuild_sla_summary(show_errors=False)
+        print(message)
+        raise SystemExit(0 if success else 1)
     run_login()
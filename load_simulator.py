@@ -0,0 +1,428 @@
+# ----------------------------------------------------------------
+# SIMULADOR DE CARGA MULTI-CLIENTE PARA TaskTrackingSystem
+# ----------------------------------------------------------------
+# Lanza N agentes virtuales (hilos o procesos) que repiten asignaciones, cierres,
+# consultas y reportes contra la misma base de datos, con una mezcla de operaciones
+# y tiempos de espera configurables, y al final informa por operación:
+# throughput, percentiles de latencia, deadlocks, timeouts de bloqueo, esperas por bloqueo y
+# reintentos de complete/delete porque un reporte concurrente cambió el ticket (p. ej. a 'Overdue').
+#
+# Ejemplos:
+#   python load_simulator.py --agents 30 --duration 120 --mix assign=5,complete=4,open_tickets=3,report=1
+#   python load_simulator.py --backend sqlite --agents 8 --mode processes --cleanup
+import argparse
+import datetime
+import math
+import multiprocessing
+import random
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pyodbc
+
+from App import StaleTicketError, TaskTrackingSystem, get_db_connection
+
+OPERATIONS = ("assign", "complete", "open_tickets", "report")
+
+# Esperas por bloqueo acumuladas en la sesión actual (SQL Server 2016+, requiere VIEW SERVER STATE).
+# Los contadores se reinician al abrir la sesión o al reutilizarla desde el pool de conexiones.
+LOCK_WAITS_SQL = """
+SELECT ISNULL(SUM(wait_time_ms), 0) FROM sys.dm_exec_session_wait_stats
+WHERE session_id = @@SPID AND wait_type LIKE 'LCK[_]M[_]%'
+"""
+
+# ----------------------------------------------------------------
+# 1. BACKENDS: SQL SERVER Y SUSTITUTO EMBEBIDO (SQLite)
+# ----------------------------------------------------------------
+class InstrumentedTracker(TaskTrackingSystem):
+    """TaskTrackingSystem que propaga los errores de BD en vez de mostrar diálogos y mide esperas por bloqueo."""
+
+    def __init__(self):
+        super().__init__()
+        self.lock_wait_ms = 0
+        # Reintentos de complete/delete porque el ticket cambió entre la lectura y la escritura
+        # (típicamente, la transición a 'Overdue' de un reporte concurrente)
+        self.stale_retries = 0
+        # Tiempo gastado en LOCK_WAITS_SQL: run_agent lo descuenta de la latencia medida
+        self.lock_stats_seconds = 0.0
+        self._lock_stats_available = True
+
+    def _connect(self):
+        conn = get_db_connection(show_errors=False)
+        if not conn:
+            raise ConnectionError("No se pudo conectar a SQL Server.")
+        return conn
+
+    def _collect_lock_waits(self, conn):
+        if not self._lock_stats_available:
+            return
+        started = time.perf_counter()
+        try:
+            self.lock_wait_ms += conn.cursor().execute(LOCK_WAITS_SQL).fetchone()[0]
+        except pyodbc.Error:
+            self._lock_stats_available = False  # Sin permisos: se informa como n/d
+        finally:
+            self.lock_stats_seconds += time.perf_counter() - started
+
+    def _execute_query(self, query, params=(), fetch=None, is_commit=False):
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            if is_commit:
+                conn.commit()
+            result = True
+            if fetch == 'one':
+                result = cursor.fetchone()
+            elif fetch == 'all':
+                result = cursor.fetchall()
+            self._collect_lock_waits(conn)
+            return result
+        finally:
+            conn.close()
+
+    def _execute_transaction(self, statements, show_errors=None):
+        # show_errors se acepta por compatibilidad con la clase base y se ignora: aquí los errores siempre se propagan
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            for statement in statements:
+                cursor.execute(statement[0], statement[1])
+                if len(statement) > 2 and statement[2] and cursor.rowcount == 0:
+                    raise StaleTicketError(statement[0])
+            conn.commit()
+            self._collect_lock_waits(conn)
+            return True
+        except StaleTicketError:
+            self.stale_retries += 1
+            conn.rollback()
+            raise
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+class SqliteStandInTracker(InstrumentedTracker):
+    """Sustituto embebido: mismas operaciones y transacciones sobre un archivo SQLite.
+
+    Sirve para probar el simulador sin servidor. SQLite bloquea la base completa al escribir,
+    así que sus cifras de contención no son comparables con las de SQL Server.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS empleados (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT UNIQUE NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS tickets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticket_number TEXT UNIQUE NOT NULL,
+        employee_id INTEGER NOT NULL REFERENCES empleados(id),
+        task_type TEXT NOT NULL,
+        received_time TIMESTAMP NOT NULL,
+        expected_completion TIMESTAMP NOT NULL,
+        actual_completion TIMESTAMP,
+        status TEXT NOT NULL,
+        delay_hours REAL
+    );
+    """
+
+    def __init__(self, path, busy_timeout_seconds=5):
+        super().__init__()
+        self.path = path
+        self.busy_timeout_seconds = busy_timeout_seconds
+        self._lock_stats_available = False
+
+    def create_schema(self):
+        counters = ",\n".join(f"{c} NUMERIC NOT NULL DEFAULT 0" for c in self.SUMMARY_COUNTERS)
+        conn = self._connect()
+        try:
+            conn.executescript(self.SCHEMA + f"""
+            CREATE TABLE IF NOT EXISTS sla_daily_summary (
+                summary_date DATE NOT NULL,
+                employee_id INTEGER NOT NULL,
+                task_type TEXT NOT NULL,
+                {counters},
+                PRIMARY KEY (summary_date, employee_id, task_type)
+            );
+            """)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_seconds,
+                               detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.create_function("ln", 1, math.log, deterministic=True)  # No todas las builds de SQLite la traen
+        return conn
+
+    def _ensure_risk_model(self):
+        if not self.risk_model.is_stale():
+            return
+        # El mismo agregado que en SQL Server, con julianday en lugar de DATEDIFF
+        rows = self._execute_query("""
+        SELECT employee_id, task_type, COUNT(*), SUM(ln(hours)), SUM(ln(hours) * ln(hours))
+        FROM (SELECT employee_id, task_type, (julianday(actual_completion) - julianday(received_time)) * 24 AS hours
+              FROM tickets WHERE actual_completion IS NOT NULL)
+        WHERE hours > 0
+        GROUP BY employee_id, task_type
+        """, fetch='all')
+        if rows is not None:
+            self.risk_model.load(rows)
+
+    def _summary_delta_statement(self, received_time, employee_id, task_type, deltas):
+        columns = self.SUMMARY_COUNTERS
+        sql = f"""
+        INSERT INTO sla_daily_summary (summary_date, employee_id, task_type, {", ".join(columns)})
+        VALUES (?, ?, ?, {", ".join("?" for _ in columns)})
+        ON CONFLICT (summary_date, employee_id, task_type)
+        DO UPDATE SET {", ".join(f"{c} = {c} + excluded.{c}" for c in columns)}
+        """
+        params = (received_time.date(), employee_id, task_type) + tuple(deltas[c] for c in columns)
+        return sql, params
+
+    def _mark_overdue_tickets(self):
+        cutoff = datetime.datetime.now()
+        statements = [
+            ("""
+            INSERT INTO sla_daily_summary (summary_date, employee_id, task_type, open_count, overdue_count)
+            SELECT date(received_time), employee_id, task_type, -COUNT(*), COUNT(*)
+            FROM tickets WHERE status = 'Open' AND expected_completion < ?
+            GROUP BY date(received_time), employee_id, task_type
+            ON CONFLICT (summary_date, employee_id, task_type)
+            DO UPDATE SET open_count = open_count + excluded.open_count,
+                          overdue_count = overdue_count + excluded.overdue_count
+            """, (cutoff,)),
+            ("UPDATE tickets SET status = 'Overdue' WHERE status = 'Open' AND expected_completion < ?", (cutoff,)),
+        ]
+        self._execute_transaction(statements)
+
+
+def make_tracker(config):
+    if config["backend"] == "sqlite":
+        return SqliteStandInTracker(config["sqlite_path"], config["busy_timeout"])
+    return InstrumentedTracker()
+
+
+def classify_error(exc):
+    """Clasifica un error de BD como deadlock, timeout de bloqueo u otro error."""
+    text = str(exc)
+    if "(1205)" in text or "deadlock" in text.lower():
+        return "deadlocks"
+    if "(1222)" in text or "HYT00" in text or "database is locked" in text:
+        return "lock_timeouts"
+    return "errors"
+
+# ----------------------------------------------------------------
+# 2. AGENTES VIRTUALES
+# ----------------------------------------------------------------
+def _new_stats():
+    return {op: {"latencies": [], "errors": 0, "connect_errors": 0, "deadlocks": 0, "lock_timeouts": 0,
+                 "stale_retries": 0, "stale_failures": 0, "lock_wait_ms": 0}
+            for op in OPERATIONS}
+
+
+def run_agent(agent_id, config):
+    """Bucle de un agente: elige operación según la mezcla, la ejecuta, la mide y espera su think time."""
+    rng = random.Random(f"{config['seed']}-{agent_id}")
+    tracker = make_tracker(config)
+    task_types = list(tracker.task_types)
+    operations = list(config["mix"])
+    weights = [config["mix"][op] for op in operations]
+    stats = _new_stats()
+    my_tickets = []
+    sequence = 0
+    lock_stats_seconds = 0.0
+
+    deadline = time.monotonic() + config["duration"]
+    while time.monotonic() < deadline:
+        operation = rng.choices(operations, weights)[0]
+        if operation == "complete" and not my_tickets:
+            operation = "assign"  # Aún no tiene tickets abiertos propios
+
+        tracker.lock_wait_ms = 0
+        tracker.stale_retries = 0
+        tracker.lock_stats_seconds = 0.0
+        start = time.perf_counter()
+        try:
+            if operation == "assign":
+                sequence += 1
+                ticket_number = f"SIM-{config['run_id']}-{agent_id:03d}-{sequence:06d}"
+                # Algunos tickets nacen ya vencidos para que el reporte tenga trabajo que marcar
+                received_time = datetime.datetime.now() - datetime.timedelta(hours=rng.uniform(0, 12))
+                ok, _ = tracker.assign_ticket(ticket_number, rng.choice(config["employees"]),
+                                              rng.choice(task_types), received_time.replace(microsecond=0))
+                if ok:
+                    my_tickets.append(ticket_number)
+            elif operation == "complete":
+                ticket_number = my_tickets.pop(rng.randrange(len(my_tickets)))
+                ok, _ = tracker.complete_ticket(ticket_number, datetime.datetime.now().replace(microsecond=0))
+            elif operation == "open_tickets":
+                # Lo que refresca la pestaña Completar: abiertos por riesgo (y recarga horaria del modelo)
+                ok = tracker.get_open_tickets_by_risk() is not None
+            else:
+                ok = tracker.generate_report_data() is not None
+        except (pyodbc.Error, sqlite3.Error) as e:
+            stats[operation][classify_error(e)] += 1
+        except ConnectionError:
+            # Límite de conexiones o servidor saturado: se cuenta y el agente sigue
+            stats[operation]["connect_errors"] += 1
+        else:
+            if ok:
+                # Sin el viaje extra de la consulta de esperas, que no forma parte de la operación
+                stats[operation]["latencies"].append(time.perf_counter() - start - tracker.lock_stats_seconds)
+            elif tracker.stale_retries:
+                stats[operation]["stale_failures"] += 1  # Se agotaron los reintentos
+            else:
+                stats[operation]["errors"] += 1
+        stats[operation]["stale_retries"] += tracker.stale_retries
+        stats[operation]["lock_wait_ms"] += tracker.lock_wait_ms
+        lock_stats_seconds += tracker.lock_stats_seconds
+
+        think_min, think_max = config["think_time_ms"]
+        time.sleep(rng.uniform(think_min, think_max) / 1000)
+
+    stats["_lock_stats_available"] = tracker._lock_stats_available
+    stats["_lock_stats_seconds"] = lock_stats_seconds
+    return stats
+
+# ----------------------------------------------------------------
+# 3. PREPARACIÓN, EJECUCIÓN E INFORME
+# ----------------------------------------------------------------
+def prepare(config):
+    """Crea el esquema (solo SQLite) y los empleados simulados que falten."""
+    tracker = make_tracker(config)
+    if config["backend"] == "sqlite":
+        tracker.create_schema()
+    existing = {row[0] for row in tracker.get_employees() or []}
+    for name in config["employees"]:
+        if name not in existing:
+            tracker.add_employee(name)
+
+
+def cleanup(config):
+    """Borra los tickets de esta corrida con delete_ticket, para que el resumen diario quede cuadrado."""
+    tracker = make_tracker(config)
+    rows = tracker._execute_query("SELECT ticket_number FROM tickets WHERE ticket_number LIKE ?",
+                                  (f"SIM-{config['run_id']}-%",), fetch='all')
+    for (ticket_number,) in rows or []:
+        tracker.delete_ticket(ticket_number)
+    return len(rows or [])
+
+
+def run_simulation(config):
+    agent_ids = range(config["agents"])
+    started = time.perf_counter()
+    if config["mode"] == "processes":
+        with multiprocessing.Pool(config["agents"]) as pool:
+            results = pool.starmap(run_agent, [(agent_id, config) for agent_id in agent_ids])
+    else:
+        with ThreadPoolExecutor(max_workers=config["agents"]) as executor:
+            results = list(executor.map(lambda agent_id: run_agent(agent_id, config), agent_ids))
+    elapsed = time.perf_counter() - started
+
+    merged = _new_stats()
+    for stats in results:
+        for op in OPERATIONS:
+            for key, value in stats[op].items():
+                merged[op][key] += value
+    lock_stats_available = all(stats["_lock_stats_available"] for stats in results)
+    # El throughput se calcula sobre el tiempo que cada agente no pasó midiendo esperas por bloqueo
+    measured = elapsed - sum(stats["_lock_stats_seconds"] for stats in results) / len(results)
+    return merged, elapsed, measured, lock_stats_available
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def print_report(merged, elapsed, measured, lock_stats_available, config):
+    print(f"\nBackend: {config['backend']} | Agentes: {config['agents']} ({config['mode']}) | "
+          f"Duración real: {elapsed:.1f} s | Corrida: {config['run_id']}")
+    header = (f"{'Operación':<13}{'OK':>8}{'Errores':>9}{'Conexión':>10}{'Deadlocks':>11}{'Timeouts':>10}"
+              f"{'Reintentos':>12}{'Agotados':>10}{'ops/s':>9}"
+              f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'máx ms':>9}{'Bloqueo ms/op':>15}")
+    print(header)
+    print("-" * len(header))
+    total_ok = 0
+    for op in OPERATIONS:
+        s = merged[op]
+        latencies = sorted(value * 1000 for value in s["latencies"])
+        attempts = (len(latencies) + s["errors"] + s["connect_errors"] + s["deadlocks"] + s["lock_timeouts"]
+                    + s["stale_failures"])
+        if not attempts:
+            continue
+        total_ok += len(latencies)
+        lock_wait = f"{s['lock_wait_ms'] / attempts:.1f}" if lock_stats_available else "n/d"
+        print(f"{op:<13}{len(latencies):>8}{s['errors']:>9}{s['connect_errors']:>10}{s['deadlocks']:>11}"
+              f"{s['lock_timeouts']:>10}{s['stale_retries']:>12}{s['stale_failures']:>10}"
+              f"{len(latencies) / measured:>9.1f}{_percentile(latencies, 50):>9.1f}"
+              f"{_percentile(latencies, 95):>9.1f}{_percentile(latencies, 99):>9.1f}"
+              f"{(latencies[-1] if latencies else 0):>9.1f}{lock_wait:>15}")
+    print("-" * len(header))
+    print(f"Throughput total: {total_ok / measured:.1f} ops/s")
+
+
+def _parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Operación desconocida '{name}'. Válidas: {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _parse_think_time(text):
+    low, _, high = text.partition("-")
+    return float(low), float(high or low)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador de carga multi-cliente para TaskTrackingSystem")
+    parser.add_argument("--agents", type=int, default=10, help="Número de agentes virtuales.")
+    parser.add_argument("--duration", type=float, default=60, help="Duración de la prueba en segundos.")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix("assign=5,complete=4,open_tickets=3,report=1"),
+                        help="Pesos por operación, p. ej. assign=5,complete=4,open_tickets=3,report=1")
+    parser.add_argument("--think-time", type=_parse_think_time, default=(200.0, 1000.0),
+                        help="Espera entre operaciones en ms, fija ('500') o rango ('200-1000').")
+    parser.add_argument("--mode", choices=("threads", "processes"), default="threads")
+    parser.add_argument("--backend", choices=("sqlserver", "sqlite"), default="sqlserver",
+                        help="sqlserver usa get_db_connection de App.py; sqlite, un archivo local de sustituto.")
+    parser.add_argument("--sqlite-path", default="simulacion_carga.db")
+    parser.add_argument("--busy-timeout", type=float, default=5, help="Timeout de bloqueo de SQLite en segundos.")
+    parser.add_argument("--employees", type=int, default=5, help="Empleados simulados entre los que se reparten tickets.")
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--cleanup", action="store_true", help="Borra al final los tickets creados por la corrida.")
+    args = parser.parse_args()
+
+    config = {
+        "agents": args.agents,
+        "duration": args.duration,
+        "mix": args.mix,
+        "think_time_ms": args.think_time,
+        "mode": args.mode,
+        "backend": args.backend,
+        "sqlite_path": args.sqlite_path,
+        "busy_timeout": args.busy_timeout,
+        "employees": [f"Agente Simulado {n:02d}" for n in range(1, args.employees + 1)],
+        "seed": args.seed,
+        "run_id": uuid.uuid4().hex[:8],
+    }
+
+    prepare(config)
+    merged, elapsed, measured, lock_stats_available = run_simulation(config)
+    print_report(merged, elapsed, measured, lock_stats_available, config)
+    if args.cleanup:
+        print(f"Tickets de la corrida borrados: {cleanup(config)}")
+
+
+if __name__ == "__main__":
+    main()
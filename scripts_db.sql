@@ -65,3 +65,28 @@ VALUES
 (N'Error en login', N'El sistema no permite acceder con usuario válido', 1, GETDATE(), DATEADD(HOUR, 2, GETDATE()), 'Pendiente'),
 (N'Falla en reporte', N'El reporte no exporta en CSV correctamente', 2, GETDATE(), DATEADD(HOUR, 5, GETDATE()), 'En Progreso');
 GO
+
+-- 6. Tabla resumen diaria de SLA
+-- Una fila por (fecha de recepción, empleado, tipo de tarea). La aplicación la mantiene
+-- de forma incremental al asignar, completar, borrar y marcar tickets como vencidos.
+-- Para el backfill inicial o para corregir desvíos: python App.py --rebuild-summary
+IF OBJECT_ID('sla_daily_summary', 'U') IS NOT NULL DROP TABLE sla_daily_summary;
+CREATE TABLE sla_daily_summary (
+    summary_date DATE NOT NULL,
+    employee_id INT NOT NULL,
+    task_type NVARCHAR(100) NOT NULL,
+    assigned_count INT NOT NULL DEFAULT 0,
+    open_count INT NOT NULL DEFAULT 0,
+    overdue_count INT NOT NULL DEFAULT 0,
+    on_time_count INT NOT NULL DEFAULT 0,
+    late_count INT NOT NULL DEFAULT 0,
+    total_delay_hours DECIMAL(18, 2) NOT NULL DEFAULT 0,
+    -- Histograma de retrasos de los tickets completados tarde
+    delay_0_1h INT NOT NULL DEFAULT 0,
+    delay_1_4h INT NOT NULL DEFAULT 0,
+    delay_4_8h INT NOT NULL DEFAULT 0,
+    delay_8_24h INT NOT NULL DEFAULT 0,
+    delay_24h_plus INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (summary_date, employee_id, task_type)
+);
+GO